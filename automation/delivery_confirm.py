@@ -0,0 +1,154 @@
+import itertools
+import time
+from collections import deque
+
+
+class PendingDelivery:
+    """一条已按下回车、尚未确认送达的消息"""
+
+    def __init__(self, job_id, contact, message):
+        self.job_id = job_id
+        self.contact = contact
+        self.message = message
+        self.sent_at = time.time()
+
+    def describe(self):
+        """用于日志的简要描述: 任务ID(联系人: 消息前 20 个字符)"""
+        preview = self.message if len(self.message) <= 20 else self.message[:20] + "..."
+        return f"{self.job_id}({self.contact}: {preview})"
+
+
+class DeliveryConfirmer:
+    """送达确认器，通过读取聊天消息列表核对已发送的消息
+
+    为了不拖慢发送速度，确认可以延迟批量进行：
+        - immediate: 每次发送后立即确认
+        - lazy: 切换聊天对象前、或累计 batch_size 条待确认消息时统一确认
+        - off: 不做确认
+    """
+
+    MODES = ("immediate", "lazy", "off")
+    # 最多保留的未确认记录数
+    MAX_UNCONFIRMED = 100
+    # 等待消息列表刷新时的重读间隔(秒)
+    POLL_INTERVAL = 0.2
+
+    def __init__(self, read_messages, logger=None, mode="lazy", batch_size=5, tail_size=20,
+                 settle_timeout=2.0, on_unconfirmed=None):
+        """初始化送达确认器
+
+        Args:
+            read_messages: 回调函数，参数为读取条数，返回当前聊天最近的己方(发出)消息文本列表(由旧到新)
+            logger: 日志回调
+            mode: 确认模式，见 MODES
+            batch_size: lazy 模式下累计多少条消息后触发一次确认
+            tail_size: 每次确认时至少读取的消息条数
+            settle_timeout: 消息列表尚未显示最新消息时，最多重读等待的秒数
+            on_unconfirmed: 回调函数，参数为本次未确认的任务ID列表
+        """
+        self.read_messages = read_messages
+        self.logger = logger or (lambda msg: print(msg))
+        self.mode = mode if mode in self.MODES else "lazy"
+        self.batch_size = max(1, int(batch_size))
+        self.tail_size = max(1, int(tail_size))
+        self.settle_timeout = max(0.0, float(settle_timeout))
+        self.pending = []
+        self.unconfirmed = deque(maxlen=self.MAX_UNCONFIRMED)
+        self.on_unconfirmed = on_unconfirmed
+        self._job_counter = itertools.count(1)
+
+    def log(self, msg):
+        if self.logger:
+            self.logger(msg)
+
+    def new_job_id(self):
+        """生成一个新的任务ID"""
+        return f"job-{next(self._job_counter):04d}"
+
+    def before_chat(self, contact):
+        """切换聊天对象前调用，确认上一个聊天中积压的消息
+
+        消息列表只显示当前聊天的内容，所以必须在搜索新联系人之前完成确认。
+
+        Args:
+            contact: 即将发送的联系人
+        """
+        if self.pending and self.pending[-1].contact != contact:
+            self.log(f"[确认] 切换聊天对象，确认 {self.pending[-1].contact} 的 {len(self.pending)} 条消息")
+            self.confirm()
+
+    def track(self, job_id, contact, message):
+        """登记一条已发送的消息，必要时触发确认
+
+        Args:
+            job_id: 任务ID
+            contact: 联系人
+            message: 消息内容
+        """
+        if self.mode == "off":
+            return
+        self.pending.append(PendingDelivery(job_id, contact, message))
+        if self.mode == "immediate" or len(self.pending) >= self.batch_size:
+            self.confirm()
+
+    def confirm(self):
+        """读取消息列表，核对所有待确认消息
+
+        待确认消息都属于当前聊天，且应按发送顺序出现在己方消息的末尾。
+        从最新的一条开始倒序比对：最新的待确认消息必须是最新的一条己方消息，
+        更早出现过的相同文本不能作为送达依据。
+        微信渲染新消息有延迟，未全部匹配时会重读消息列表，最多等待 settle_timeout 秒。
+
+        Returns:
+            tuple: (已确认的任务ID列表, 未确认的任务ID列表)
+        """
+        if not self.pending:
+            return [], []
+
+        pending, self.pending = self.pending, []
+        deadline = time.monotonic() + self.settle_timeout
+        while True:
+            try:
+                texts = self.read_messages(max(self.tail_size, len(pending)))
+            except Exception as e:
+                self.log(f"[确认] 读取消息列表失败: {e}")
+                texts = []
+            confirmed, missing = self._match(pending, texts)
+            if not missing or time.monotonic() >= deadline:
+                break
+            time.sleep(self.POLL_INTERVAL)
+
+        self.unconfirmed.extend(missing)
+        unconfirmed = [item.job_id for item in missing]
+
+        if confirmed:
+            self.log(f"[确认] 已确认送达 {len(confirmed)} 条: {', '.join(confirmed)}")
+        if unconfirmed:
+            self.log(f"[警告] 未确认送达 {len(unconfirmed)} 条: {', '.join(item.describe() for item in missing)}")
+            if self.on_unconfirmed:
+                self.on_unconfirmed(unconfirmed)
+        return confirmed, unconfirmed
+
+    def _match(self, pending, texts):
+        """倒序比对待确认消息与己方消息末尾，返回 (已确认的任务ID列表, 未确认的条目列表)"""
+        tail = [self._normalize(t) for t in texts]
+        confirmed, missing = [], []
+        pos = len(tail) - 1
+        for item in reversed(pending):
+            if pos >= 0 and tail[pos] == self._normalize(item.message):
+                confirmed.append(item.job_id)
+                pos -= 1
+            else:
+                missing.append(item)
+        confirmed.reverse()
+        missing.reverse()
+        return confirmed, missing
+
+    def unconfirmed_jobs(self):
+        """返回最近未能确认送达的任务ID(最多 MAX_UNCONFIRMED 条)"""
+        return [item.job_id for item in self.unconfirmed]
+
+    @staticmethod
+    def _normalize(text):
+        # 消息列表中的文本换行/空白可能与输入不同，统一压缩后再比较
+        return " ".join((text or "").split())
@@ -0,0 +1,98 @@
+import ctypes
+import win32gui
+
+# 配置中的偏移量以 96 DPI(100% 缩放)下的逻辑像素表示
+DEFAULT_BASE_DPI = 96
+
+# 默认点击目标: 相对锚点控件矩形某个角的偏移
+DEFAULT_TARGETS = {
+    "search_box": {"anchor": "top_left", "x": 140, "y": 40},
+    "first_result": {"anchor": "top_left", "x": 140, "y": 120},
+    "input_box": {"anchor": "bottom_right", "x": -100, "y": -40},
+}
+
+
+def get_window_rect(hwnd):
+    """通过 Win32 获取窗口矩形，不经过 UIA"""
+    return tuple(win32gui.GetWindowRect(hwnd))
+
+
+def get_window_dpi(hwnd):
+    """获取窗口所在显示器的 DPI，系统不支持时返回默认值"""
+    try:
+        return ctypes.windll.user32.GetDpiForWindow(hwnd) or DEFAULT_BASE_DPI
+    except Exception:
+        return DEFAULT_BASE_DPI
+
+
+class WindowLayout:
+    """某一窗口几何/DPI 下计算好的点击目标"""
+
+    def __init__(self, anchor, rect, scale, targets):
+        """初始化窗口布局
+
+        Args:
+            anchor: 锚点控件(第一个 Pane)，同时用作键盘输入目标
+            rect: 锚点控件矩形
+            scale: DPI 缩放比例
+            targets: 点击目标配置 {名称: {anchor, x, y}}
+        """
+        self.anchor = anchor
+        self.rect = rect
+        self.scale = scale
+        self.points = {name: self._compute(spec) for name, spec in targets.items()}
+
+    def _compute(self, spec):
+        corner = spec.get("anchor", "top_left")
+        base_x = self.rect.right if corner.endswith("right") else self.rect.left
+        base_y = self.rect.bottom if corner.startswith("bottom") else self.rect.top
+        return (base_x + round(spec.get("x", 0) * self.scale),
+                base_y + round(spec.get("y", 0) * self.scale))
+
+    def point(self, name):
+        """返回指定点击目标的屏幕坐标"""
+        return self.points[name]
+
+
+class LayoutCache:
+    """按窗口矩形和 DPI 缓存的布局
+
+    只有窗口移动、缩放或 DPI 变化时才重新通过 UIA 查询锚点控件。
+    """
+
+    def __init__(self, targets=None, base_dpi=DEFAULT_BASE_DPI, logger=None):
+        self.targets = dict(DEFAULT_TARGETS)
+        self.targets.update(targets or {})
+        self.base_dpi = base_dpi or DEFAULT_BASE_DPI
+        self.logger = logger or (lambda msg: print(msg))
+        self._key = None
+        self._layout = None
+
+    def log(self, msg):
+        if self.logger:
+            self.logger(msg)
+
+    def get(self, hwnd, find_anchor):
+        """返回当前窗口的布局，几何或 DPI 变化时重新计算
+
+        Args:
+            hwnd: 微信主窗口句柄
+            find_anchor: 回调函数，返回作为定位基准的锚点控件
+
+        Returns:
+            WindowLayout: 窗口布局
+        """
+        dpi = get_window_dpi(hwnd)
+        key = (hwnd, get_window_rect(hwnd), dpi)
+        if key != self._key:
+            anchor = find_anchor()
+            rect = anchor.rectangle()
+            self._layout = WindowLayout(anchor, rect, dpi / self.base_dpi, self.targets)
+            self._key = key
+            self.log(f"[布局] 窗口几何已更新: rect={key[1]}, dpi={dpi}, 点击目标={self._layout.points}")
+        return self._layout
+
+    def invalidate(self):
+        """清除缓存，下次获取时重新计算"""
+        self._key = None
+        self._layout = None
@@ -0,0 +1,60 @@
+class SelectionContext:
+    """一次搜索结果选择所需的上下文"""
+
+    def __init__(self, main_win, search_box, contact, search_point, first_result_point):
+        self.main_win = main_win
+        self.search_box = search_box
+        self.contact = contact
+        self.search_point = search_point
+        self.first_result_point = first_result_point
+
+
+class SelectionStrategy:
+    """搜索结果选择策略基类
+
+    子类实现 select()，失败时抛出异常，由 StrategySelector 记录并回退到下一个策略。
+    """
+
+    name = ""
+
+    def select(self, automation, context):
+        raise NotImplementedError
+
+
+class EnterKeyStrategy(SelectionStrategy):
+    """按回车选中第一个搜索结果"""
+
+    name = "enter_key"
+
+    def select(self, automation, context):
+        context.search_box.type_keys('{ENTER}', set_foreground=True)
+
+
+class ClickFirstItemStrategy(SelectionStrategy):
+    """点击第一个搜索结果的位置"""
+
+    name = "click_first_item"
+
+    def select(self, automation, context):
+        automation.mouse_click(*context.first_result_point)
+
+
+class ClickMatchingItemStrategy(SelectionStrategy):
+    """在搜索结果中查找名称与联系人完全一致的条目并点击"""
+
+    name = "click_matching_item"
+
+    def select(self, automation, context):
+        item_config = automation.control_configs.get("search_result_item", {})
+        control_type = item_config.get("control_type") or "ListItem"
+        for item in context.main_win.descendants(control_type=control_type):
+            if item.window_text().strip() == context.contact:
+                item.click_input()
+                return
+        raise RuntimeError(f"搜索结果中没有与 '{context.contact}' 匹配的条目")
+
+
+def default_strategies():
+    """返回所有内置策略，按名称索引"""
+    strategies = [EnterKeyStrategy(), ClickFirstItemStrategy(), ClickMatchingItemStrategy()]
+    return {strategy.name: strategy for strategy in strategies}
@@ -0,0 +1,171 @@
+import json
+import os
+import time
+
+
+class StrategyStats:
+    """单个策略的成功率与耗时统计"""
+
+    # 样本数超过该值后减半，使统计能跟上微信版本/环境的变化
+    MAX_SAMPLES = 50
+    # 耗时的指数滑动平均系数
+    LATENCY_ALPHA = 0.2
+
+    def __init__(self, attempts=0, successes=0, avg_latency=None):
+        self.attempts = attempts
+        self.successes = successes
+        self.avg_latency = avg_latency
+
+    @property
+    def success_rate(self):
+        return self.successes / self.attempts if self.attempts else 0.0
+
+    def record(self, success, latency):
+        self.attempts += 1
+        if success:
+            self.successes += 1
+            if self.avg_latency is None:
+                self.avg_latency = latency
+            else:
+                self.avg_latency += self.LATENCY_ALPHA * (latency - self.avg_latency)
+        if self.attempts > self.MAX_SAMPLES:
+            self.attempts //= 2
+            self.successes = min(self.attempts, round(self.successes / 2))
+
+    def to_dict(self):
+        return {"attempts": self.attempts, "successes": self.successes, "avg_latency": self.avg_latency}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(int(data.get("attempts", 0)), int(data.get("successes", 0)), data.get("avg_latency"))
+
+
+class StrategySelector:
+    """按成功率和耗时给可互换的策略排序，失败时自动回退
+
+    排序规则：
+        1. 已验证可靠的策略(样本数 >= min_samples 且成功率 >= min_success_rate)，按平均耗时升序
+        2. 样本不足的策略，按配置的优先顺序
+        3. 不可靠的策略，按成功率降序
+    被降级的策略每 probe_interval 次选择会被优先重试一次，使偶发失败不会让它永久垫底。
+    统计数据保存在 stats_path 中，跨次运行保留。
+    """
+
+    def __init__(self, strategies, preferred=None, stats_path=None, max_attempts=3,
+                 min_samples=3, min_success_rate=0.8, probe_interval=20, logger=None):
+        """初始化策略选择器
+
+        Args:
+            strategies: 策略字典 {名称: 策略对象}
+            preferred: 样本不足时的优先顺序(策略名称列表)
+            stats_path: 统计数据文件路径，为空则不持久化
+            max_attempts: 单次选择最多尝试的策略数
+            min_samples: 判定策略可靠所需的最少样本数
+            min_success_rate: 判定策略可靠所需的最低成功率
+            probe_interval: 每隔多少次选择优先重试一次被降级的策略，0 表示不重试
+            logger: 日志回调
+        """
+        self.strategies = strategies
+        preferred = [name for name in (preferred or []) if name in strategies]
+        self.preferred = preferred + [name for name in strategies if name not in preferred]
+        self.stats_path = stats_path
+        self.max_attempts = max(1, int(max_attempts))
+        self.min_samples = min_samples
+        self.min_success_rate = min_success_rate
+        self.probe_interval = probe_interval
+        self._runs = 0
+        self.logger = logger or (lambda msg: print(msg))
+        self.stats = {name: StrategyStats() for name in strategies}
+        # 最近一次 run() 实际尝试的策略数
+        self.last_attempts = 0
+        self._load_stats()
+
+    def log(self, msg):
+        if self.logger:
+            self.logger(msg)
+
+    def ranked(self):
+        """返回按优先级排序的策略名称列表"""
+        def sort_key(name):
+            stats = self.stats[name]
+            if stats.attempts < self.min_samples:
+                return (1, self.preferred.index(name))
+            if stats.success_rate >= self.min_success_rate:
+                return (0, stats.avg_latency or 0.0)
+            return (2, -stats.success_rate)
+        return sorted(self.strategies, key=sort_key)
+
+    def _demoted(self):
+        """返回被判定为不可靠的策略名称"""
+        return [name for name, stats in self.stats.items()
+                if stats.attempts >= self.min_samples and stats.success_rate < self.min_success_rate]
+
+    def _order(self):
+        """本次选择的尝试顺序，到达重试间隔时把样本最少的降级策略提到最前"""
+        order = self.ranked()
+        self._runs += 1
+        demoted = self._demoted()
+        if demoted and self.probe_interval and self._runs % self.probe_interval == 0:
+            probe = min(demoted, key=lambda name: self.stats[name].attempts)
+            self.log(f"[策略] 重新试探被降级的策略: {probe}")
+            order.remove(probe)
+            order.insert(0, probe)
+        return order
+
+    def run(self, attempt):
+        """按排序依次尝试策略，直到成功或达到最大尝试次数
+
+        Args:
+            attempt: 回调函数，参数为策略对象，返回 True 表示成功，异常视为失败；
+                返回 None 表示无法校验结果，视为成功但不计入统计
+
+        Returns:
+            str: 成功的策略名称，全部失败时返回 None
+        """
+        self.last_attempts = 0
+        for index, name in enumerate(self._order()[:self.max_attempts]):
+            self.last_attempts = index + 1
+            if index > 0:
+                self.log(f"[策略] 回退到策略: {name}")
+            start = time.perf_counter()
+            try:
+                result = attempt(self.strategies[name])
+            except Exception as e:
+                self.log(f"[策略] {name} 执行出错: {e}")
+                result = False
+            latency = time.perf_counter() - start
+            if result is None:
+                self.log(f"[策略] {name} 已执行，未配置结果校验，不计入统计")
+                return name
+            success = bool(result)
+            self.stats[name].record(success, latency)
+            self.log(f"[策略] {name} {'成功' if success else '失败'}，耗时 {latency:.2f} 秒")
+            if success:
+                self._save_stats()
+                return name
+        self._save_stats()
+        return None
+
+    def _load_stats(self):
+        if not self.stats_path or not os.path.exists(self.stats_path):
+            return
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for name, item in data.items():
+                if name in self.stats:
+                    self.stats[name] = StrategyStats.from_dict(item)
+        except Exception as e:
+            self.log(f"[警告] 加载策略统计失败: {e}")
+
+    def _save_stats(self):
+        if not self.stats_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.stats_path), exist_ok=True)
+            tmp_path = self.stats_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({name: stats.to_dict() for name, stats in self.stats.items()}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.stats_path)
+        except Exception as e:
+            self.log(f"[警告] 保存策略统计失败: {e}")
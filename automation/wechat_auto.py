@@ -8,6 +8,11 @@ import win32gui
 import win32con
 import win32api
 from core.config_manager import ConfigManager
+from core import metrics
+from automation.delivery_confirm import DeliveryConfirmer
+from automation.selection_strategies import SelectionContext, default_strategies
+from automation.strategy_selector import StrategySelector
+from automation.layout import LayoutCache
 import json
 
 # Windows only
@@ -19,7 +24,7 @@ def try_import_pywinauto():
         return None
 
 class WeChatAutomation:
-    def __init__(self, logger=None, config_path=None):
+    def __init__(self, logger=None, config_path=None, registry=None, config_manager=None):
         self.logger = logger or (lambda msg: print(msg))
         self.is_mac = platform.system() == "Darwin"
         self.is_win = platform.system() == "Windows"
@@ -29,13 +34,64 @@ class WeChatAutomation:
         # 自动化工具窗口的关键词，用于排除
         self.exclude_keywords = ["autoWeComLite", "automation"]
         
-        # 加载配置
-        self.config_manager = ConfigManager(config_path)
+        # 加载配置，可与界面共用同一个配置管理器
+        self.config_manager = config_manager or ConfigManager(config_path)
         self.control_configs = {}
         self.timeouts = {}
         self.strategies = {}
+        self._main_win = None
+        # 已定位的微信窗口 (title, handle) 和 UIA 连接，窗口句柄失效前复用
+        self._wechat_window = None
+        self._app = None
+        self._app_handle = None
+        self._chat_title = None
         self._load_configs()
         
+        # 运行指标
+        registry = registry or metrics.registry
+        self.sent_counter = registry.counter(metrics.SENT_TOTAL, "已发送的消息数")
+        failed_counter = registry.counter(metrics.FAILED_TOTAL, "发送失败的消息数(error: 发送出错, unconfirmed: 未确认送达)", labelnames=("reason",))
+        self.error_counter = failed_counter.labels(reason="error")
+        self.unconfirmed_counter = failed_counter.labels(reason="unconfirmed")
+        self.retried_counter = registry.counter(metrics.RETRIED_TOTAL, "搜索结果选择策略回退重试次数")
+        self.pending_gauge = registry.gauge(metrics.PENDING_CONFIRMATIONS, "已发送、待确认送达的消息数")
+        self.stage_latency = registry.histogram(metrics.STAGE_LATENCY, "各发送阶段耗时(秒)", labelnames=("stage",))
+        
+        # 送达确认
+        delivery_config = self.config_manager.get_section("delivery_confirmation")
+        self.delivery = DeliveryConfirmer(
+            self._read_message_list,
+            logger=self.log,
+            mode=delivery_config.get("mode", "lazy"),
+            batch_size=delivery_config.get("batch_size", 5),
+            tail_size=delivery_config.get("tail_size", 20),
+            settle_timeout=self.timeouts.get("delivery_confirm", 2.0),
+            on_unconfirmed=lambda job_ids: self.unconfirmed_counter.inc(len(job_ids)),
+        )
+        
+        # 点击目标布局，按窗口几何和 DPI 缓存
+        layout_config = self.config_manager.get_section("layout")
+        self.layout_cache = LayoutCache(
+            targets=layout_config.get("targets"),
+            base_dpi=layout_config.get("base_dpi"),
+            logger=self.log,
+        )
+        
+        # 搜索结果选择策略，按成功率和耗时自动排序
+        selection_config = self.config_manager.get_section("strategy_selection")
+        stats_file = selection_config.get("stats_file", "")
+        self.selector = StrategySelector(
+            default_strategies(),
+            preferred=[self.strategies.get("search_result_selection"),
+                       self.strategies.get("alternative_search_result_selection")],
+            stats_path=self.config_manager.resolve_path(stats_file) if stats_file else None,
+            max_attempts=selection_config.get("max_attempts", 3),
+            min_samples=selection_config.get("min_samples", 3),
+            min_success_rate=selection_config.get("min_success_rate", 0.8),
+            probe_interval=selection_config.get("probe_interval", 20),
+            logger=self.log,
+        )
+        
     def _load_configs(self):
         """加载所有相关配置"""
         # Windows平台控件配置
@@ -46,12 +102,14 @@ class WeChatAutomation:
             self.control_configs["search_result_list"] = self.config_manager.get_control_config("search_result_list")
             self.control_configs["search_result_item"] = self.config_manager.get_control_config("search_result_item")
             self.control_configs["chat_title"] = self.config_manager.get_control_config("chat_title")
+            self.control_configs["message_list"] = self.config_manager.get_control_config("message_list")
         
         # 超时设置
         self.timeouts["search_result_wait"] = self.config_manager.get_timeout("search_result_wait")
         self.timeouts["chat_window_load"] = self.config_manager.get_timeout("chat_window_load")
         self.timeouts["input_focus"] = self.config_manager.get_timeout("input_focus")
         self.timeouts["typing_pause"] = self.config_manager.get_timeout("typing_pause")
+        self.timeouts["delivery_confirm"] = self.config_manager.get_timeout("delivery_confirm")
         
         # 策略设置
         self.strategies["search_result_selection"] = self.config_manager.get_strategy("search_result_selection")
@@ -70,12 +128,52 @@ class WeChatAutomation:
         if self.logger:
             self.logger(msg)
 
-    def focus_wechat_window(self):
-        """查找并激活微信窗口，考虑兼容性"""
-        self.log("[窗口查找] 开始查找微信窗口")
-        
+    def warm_up(self):
+        """预热：定位微信窗口、建立 UIA 连接并计算布局，不激活窗口
+
+        在后台线程中于界面显示后调用，使首次发送无需再做这些耗时操作。
+        """
         if not self.is_win or not self.pywinauto:
             raise RuntimeError("仅支持Windows平台")
+        title, handle = self._get_wechat_window()
+        main_win = self._connect(title, handle)
+        self.layout_cache.get(handle, lambda: self._find_anchor_pane(title, main_win))
+        self.log(f"[预热] 已连接微信窗口: '{title}', handle={handle}")
+
+    def _get_wechat_window(self):
+        """返回缓存的微信窗口 (title, handle)，句柄失效时重新查找"""
+        if self._wechat_window and win32gui.IsWindow(self._wechat_window[1]):
+            return self._wechat_window
+        self._wechat_window = self._locate_wechat_window()
+        return self._wechat_window
+
+    def _connect(self, title, handle):
+        """返回微信主窗口的 UIA 包装对象，同一窗口句柄下复用连接"""
+        if self._app is None or self._app_handle != handle:
+            self._app = Application(backend="uia").connect(handle=handle, timeout=5)
+            self._app_handle = handle
+            self._main_win = None
+            self._chat_title = None
+        if self._main_win is None:
+            self._main_win = self._app.window(handle=handle)
+        return self._main_win
+
+    def _reset_connection(self):
+        """清除缓存的窗口、连接和布局，下次发送时重新定位"""
+        self._wechat_window = None
+        self._app = None
+        self._app_handle = None
+        self._main_win = None
+        self._chat_title = None
+        self.layout_cache.invalidate()
+
+    def _locate_wechat_window(self):
+        """枚举桌面窗口，查找微信主窗口
+
+        Returns:
+            tuple: (窗口标题, 窗口句柄)
+        """
+        self.log("[窗口查找] 开始查找微信窗口")
         
         # 输出系统环境信息
         self.log(f"[系统信息] 操作系统: {platform.system()} {platform.release()}, Python版本: {platform.python_version()}")
@@ -166,11 +264,20 @@ class WeChatAutomation:
         wechat_windows.sort(key=lambda x: x[3])  # 按优先级排序
         title, class_name, handle, _ = wechat_windows[0]
         
-        self.log(f"[选择] 将激活窗口: '{title}', class='{class_name}', handle={handle}")
+        self.log(f"[选择] 找到微信窗口: '{title}', class='{class_name}', handle={handle}")
         
         # 如果找到的窗口类名与配置不符，建议更新配置
         if wechat_class_name and class_name != wechat_class_name:
             self.log(f"[建议] 请更新配置文件中的微信窗口类名: main_window.class_name='{class_name}'")
+        return title, handle
+
+    def focus_wechat_window(self):
+        """查找并激活微信窗口，考虑兼容性"""
+        if not self.is_win or not self.pywinauto:
+            raise RuntimeError("仅支持Windows平台")
+        
+        title, handle = self._get_wechat_window()
+        self.log(f"[选择] 将激活窗口: '{title}', handle={handle}")
         
         # 通过handle获取窗口对象
         win = None
@@ -205,16 +312,73 @@ class WeChatAutomation:
             self.log(f"[警告] 激活失败，当前活动窗口为: {active.title if active else None}")
             raise RuntimeError("激活微信窗口失败")
 
-    def send_message(self, contact, message):
+    def send_message(self, contact, message, job_id=None):
+        """发送消息，返回任务ID
+
+        送达确认按配置延迟批量进行，未确认的任务会以任务ID报告。
+        """
+        job_id = job_id or self.delivery.new_job_id()
         try:
-            win = self.focus_wechat_window()
+            with self.stage_latency.labels(stage="focus").time():
+                win = self.focus_wechat_window()
             if self.is_win and self.pywinauto:
+                # 搜索新联系人前，先确认上一个聊天中积压的消息
+                self.delivery.before_chat(contact)
                 self._send_message_windows(win, contact, message)
+                self.sent_counter.inc()
+                status = "" if self.delivery.mode == "off" else "(待确认)"
+                self.log(f"[消息] [{job_id}] 已按回车发送给 {contact}{status}: {message}")
+                self.delivery.track(job_id, contact, message)
             else:
                 raise RuntimeError("不支持的操作系统")
         except Exception as e:
-            self.log(f"[错误] {e}")
+            self.error_counter.inc()
+            # 窗口句柄、连接或控件可能已失效(包括激活失败)，下次发送时重新定位
+            self._reset_connection()
+            self.log(f"[错误] [{job_id}] {e}")
             raise
+        finally:
+            self.pending_gauge.set(len(self.delivery.pending))
+        return job_id
+
+    def flush_confirmations(self):
+        """立即确认所有待确认消息，返回本次未能确认的任务ID列表"""
+        _, unconfirmed = self.delivery.confirm()
+        self.pending_gauge.set(len(self.delivery.pending))
+        return unconfirmed
+
+    def _find_message_list(self, main_win):
+        """返回当前聊天的消息列表控件"""
+        config = self.control_configs.get("message_list", {})
+        criteria = {key: config[key] for key in ("title", "control_type", "class_name") if config.get(key)}
+        return main_win.child_window(**criteria).wrapper_object()
+
+    def _is_outgoing(self, item, list_rect):
+        """判断消息条目是否为己方发出
+
+        配置了 message_list.self_name 时按头像按钮名称判断，
+        否则按头像位置判断：己方消息的头像在消息列表右侧。
+        """
+        self_name = self.control_configs.get("message_list", {}).get("self_name", "")
+        buttons = item.descendants(control_type="Button")
+        if self_name:
+            return any(button.window_text() == self_name for button in buttons)
+        center_x = (list_rect.left + list_rect.right) / 2
+        for button in buttons:
+            rect = button.rectangle()
+            if (rect.left + rect.right) / 2 > center_x:
+                return True
+        return False
+
+    def _read_message_list(self, limit):
+        """读取当前聊天消息列表中最近 limit 条消息里的己方消息文本(由旧到新)"""
+        with self.stage_latency.labels(stage="confirm").time():
+            # 发送失败后连接会被清除，这里按需重新连接，避免把已送达的消息误报为未确认
+            title, handle = self._get_wechat_window()
+            message_list = self._find_message_list(self._connect(title, handle))
+            list_rect = message_list.rectangle()
+            items = message_list.children(control_type="ListItem")
+            return [item.window_text() for item in items[-limit:] if self._is_outgoing(item, list_rect)]
 
 
     def print_all_descendants(self, window, depth=0):
@@ -248,101 +412,176 @@ class WeChatAutomation:
         win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, 0, 0, 0, 0)
         win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
 
-    def _send_message_windows(self, win, contact, message):
-        from pywinauto.application import Application
+    def _find_anchor_pane(self, title, main_win):
+        """枚举窗口控件并返回第一个 Pane 作为布局锚点，仅在窗口几何变化时调用"""
+        # 列出所有控件，帮助诊断
+        self.log("[控件枚举] ===== 开始枚举窗口控件 =====")
+        windows = Desktop(backend="uia").windows()
+        for w in windows:
+            if w.window_text() == title:
+                self.log(f"[主窗口] title='{w.window_text()}' class='{w.element_info.class_name}' handle={w.handle}")
+                # 枚举主窗口下的所有直接子控件
+                children = w.children()
+                self.log(f"[直接子控件] 数量: {len(children)}")
+                for i, child in enumerate(children):
+                    try:
+                        ctrl_type = child.element_info.control_type
+                        class_name = child.element_info.class_name
+                        title = child.window_text()
+                        self.log(f"  子控件[{i}]: type='{ctrl_type}', class='{class_name}', text='{title}'")
+                    except:
+                        pass
+                break
+        
+        self.print_all_descendants(main_win)
+        self.log("[控件枚举] ===== 枚举完毕 =====")
+        # 列出所有Edit控件
+        self.log("[编辑框枚举] ===== 开始查找所有Edit控件 =====")
+        edits = main_win.descendants(control_type="Pane")
+        self.log(f"[Edit控件] 找到 {len(edits)} 个Edit控件:")
+        for i, edit in enumerate(edits):
+            try:
+                class_name = edit.element_info.class_name
+                text = edit.window_text()
+                rect = edit.rectangle()
+                self.log(f"  Edit[{i}]: class='{class_name}', text='{text}', rect={rect}")
+            except:
+                pass
+        self.log("[编辑框枚举] ===== 枚举完毕 =====")
+        
+        if len(edits) == 0:
+            self.log("[错误] 未找到任何Edit控件，无法继续操作")
+            raise RuntimeError("未找到任何编辑框控件，请检查微信窗口状态")
         
+        search_box = edits[0]
+        self.log(f"[搜索框] 使用第一个Edit控件作为搜索框: text='{search_box.window_text()}', rect={search_box.rectangle()}")
+        return search_box
+
+    def _send_message_windows(self, win, contact, message):
         try:
-            # 列出所有控件，帮助诊断
-            self.log("[控件枚举] ===== 开始枚举窗口控件 =====")
-            windows = Desktop(backend="uia").windows()
-            for w in windows:
-                if w.window_text() == win.title:
-                    self.log(f"[主窗口] title='{w.window_text()}' class='{w.element_info.class_name}' handle={w.handle}")
-                    # 枚举主窗口下的所有直接子控件
-                    children = w.children()
-                    self.log(f"[直接子控件] 数量: {len(children)}")
-                    for i, child in enumerate(children):
-                        try:
-                            ctrl_type = child.element_info.control_type
-                            class_name = child.element_info.class_name
-                            title = child.window_text()
-                            self.log(f"  子控件[{i}]: type='{ctrl_type}', class='{class_name}', text='{title}'")
-                        except:
-                            pass
-                    break
-            
-            app = Application(backend="uia").connect(title=win.title, timeout=5)
-            main_win = app.window(title=win.title)
+            main_win = self._connect(win.title, win._hWnd)
             main_win.set_focus()
             
-            self.print_all_descendants(main_win)
-            self.log("[控件枚举] ===== 枚举完毕 =====")
-            # 列出所有Edit控件
-            self.log("[编辑框枚举] ===== 开始查找所有Edit控件 =====")
-            edits = main_win.descendants(control_type="Pane")
-            self.log(f"[Edit控件] 找到 {len(edits)} 个Edit控件:")
-            for i, edit in enumerate(edits):
-                try:
-                    class_name = edit.element_info.class_name
-                    text = edit.window_text()
-                    rect = edit.rectangle()
-                    self.log(f"  Edit[{i}]: class='{class_name}', text='{text}', rect={rect}")
-                except:
-                    pass
-            self.log("[编辑框枚举] ===== 枚举完毕 =====")
-            
-            if len(edits) == 0:
-                self.log("[错误] 未找到任何Edit控件，无法继续操作")
-                raise RuntimeError("未找到任何编辑框控件，请检查微信窗口状态")
-            
-            search_box = edits[0]
-            self.log(f"[搜索框] 使用第一个Edit控件作为搜索框: text='{search_box.window_text()}', rect={search_box.rectangle()}")
-
-            rect = search_box.rectangle()
-            center_x = (rect.left + 140)
-            center_y = (rect.top + 40)
-            self.log(f"[搜索框] 模拟鼠标点击位置: ({center_x}, {center_y})")
-            # 移动鼠标到搜索框并点击
-            self.mouse_click(center_x, center_y)
-            
-            # search_box.set_focus()
-            search_box.type_keys('^a{BACKSPACE}', set_foreground=True)
-            time.sleep(0.1)
+            # 点击目标只在窗口几何或 DPI 变化时重新计算
+            with self.stage_latency.labels(stage="layout").time():
+                layout = self.layout_cache.get(win._hWnd, lambda: self._find_anchor_pane(win.title, main_win))
+            search_box = layout.anchor
+            context = SelectionContext(main_win, search_box, contact,
+                                       search_point=layout.point("search_box"),
+                                       first_result_point=layout.point("first_result"))
             
-            # 输入联系人名称
-            self.log(f"[搜索框] 输入联系人: '{contact}'")
-            pyperclip.copy(contact)
-            search_box.type_keys('^v', set_foreground=True)
-            
-            # 等待搜索结果显示
-            search_result_wait = self.timeouts["search_result_wait"]
-            self.log(f"[搜索框] 等待搜索结果加载 (等待 {search_result_wait} 秒)")
-            time.sleep(1)
-            
-            self.mouse_click(center_x, center_y + 80)
+            # 搜索联系人并选择搜索结果，失败时自动回退到下一个策略
+            with self.stage_latency.labels(stage="open_chat").time():
+                strategy_name = self.selector.run(lambda strategy: self._open_chat(context, strategy))
+            self.retried_counter.inc(self.selector.last_attempts - 1)
+            if not strategy_name:
+                raise RuntimeError(f"所有搜索结果选择策略均失败，无法打开与 '{contact}' 的聊天")
             
             # 智能识别消息输入框
             input_box = search_box
             
-            self.mouse_click(rect.right - 100, rect.bottom - 40)
-            
-            # 输入消息
-            self.log("[消息框] 开始输入消息")
-            input_box.set_focus()
-            time.sleep(self.timeouts.get("input_focus", 0.5))  # 等待聚焦
-            search_box.type_keys('^a{BACKSPACE}', set_foreground=True)  # 清空输入框
-            time.sleep(self.timeouts.get("typing_pause", 0.3))
-            pyperclip.copy(message)  # 复制消息到剪贴板
-            search_box.type_keys('^v', set_foreground=True)  # 粘贴
-            time.sleep(self.timeouts.get("typing_pause", 0.3))  # 等待消息输入完成
-            
-            search_box.type_keys('{ENTER}', set_foreground=True)  # 按回车发送
-            self.log(f"[消息] 已发送消息: {message}")
+            with self.stage_latency.labels(stage="input").time():
+                self.mouse_click(*layout.point("input_box"))
+                
+                # 输入消息
+                self.log("[消息框] 开始输入消息")
+                input_box.set_focus()
+                time.sleep(self.timeouts.get("input_focus", 0.5))  # 等待聚焦
+                search_box.type_keys('^a{BACKSPACE}', set_foreground=True)  # 清空输入框
+                time.sleep(self.timeouts.get("typing_pause", 0.3))
+                pyperclip.copy(message)  # 复制消息到剪贴板
+                search_box.type_keys('^v', set_foreground=True)  # 粘贴
+                time.sleep(self.timeouts.get("typing_pause", 0.3))  # 等待消息输入完成
+                
+                search_box.type_keys('{ENTER}', set_foreground=True)  # 按回车发送
                 
         except Exception as e:
             self.log(f"[错误] 发送消息失败: {e}")
             raise RuntimeError(f"发送消息失败: {e}")
 
+    def _open_chat(self, context, strategy):
+        """搜索联系人并用指定策略选择搜索结果
+
+        Returns:
+            bool: 是否进入了目标聊天，未配置校验时返回 None
+        """
+        self.log(f"[搜索框] 模拟鼠标点击位置: {context.search_point}")
+        # 移动鼠标到搜索框并点击
+        self.mouse_click(*context.search_point)
+        
+        # search_box.set_focus()
+        context.search_box.type_keys('^a{BACKSPACE}', set_foreground=True)
+        time.sleep(0.1)
+        
+        # 输入联系人名称
+        self.log(f"[搜索框] 输入联系人: '{context.contact}'")
+        pyperclip.copy(context.contact)
+        context.search_box.type_keys('^v', set_foreground=True)
+        
+        # 等待搜索结果显示
+        search_result_wait = self.timeouts["search_result_wait"]
+        self.log(f"[搜索框] 等待搜索结果加载 (等待 {search_result_wait} 秒)")
+        time.sleep(1)
+        
+        self.log(f"[策略] 使用 {strategy.name} 选择搜索结果")
+        strategy.select(self, context)
+        time.sleep(self.timeouts.get("chat_window_load", 0.5))
+        return self._verify_chat_opened(context)
+
+    def _verify_chat_opened(self, context):
+        """确认已进入目标聊天(需在 chat_title.verify 中开启)
+
+        聊天标题是位于消息列表上方、横向处于消息列表范围内的文本控件，
+        其文本应包含搜索时输入的联系人名称。按备注、拼音或ID搜索时标题与输入不同，
+        此时不应开启校验。
+
+        Returns:
+            bool: 标题与联系人不符时返回 False；未开启校验或找不到消息列表/标题控件时
+                返回 None(无法校验，不计入策略统计)
+        """
+        config = self.control_configs.get("chat_title", {})
+        if not config.get("verify"):
+            return None
+        title = self._find_chat_title(context.main_win, config)
+        if title is None:
+            self.log("[策略] 未找到聊天标题控件，跳过校验")
+            return None
+        text = title.window_text().strip()
+        if context.contact in text:
+            return True
+        self.log(f"[策略] 当前聊天标题为 '{text}'，与联系人 '{context.contact}' 不符")
+        return False
+
+    def _find_chat_title(self, main_win, config):
+        """返回聊天标题控件，找到后缓存，连接重置时清除"""
+        if self._chat_title is not None:
+            try:
+                self._chat_title.window_text()
+                return self._chat_title
+            except Exception:
+                self._chat_title = None
+        try:
+            message_list = self._find_message_list(main_win)
+            list_rect = message_list.rectangle()
+            # 只在包含消息列表上方区域的最近祖先中查找，避免遍历整个窗口
+            container = message_list.parent()
+            for _ in range(3):
+                if container is None or container.rectangle().top < list_rect.top:
+                    break
+                container = container.parent()
+            if container is None:
+                return None
+            criteria = {key: config[key] for key in ("control_type", "class_name") if config.get(key)}
+            for candidate in container.descendants(**criteria):
+                rect = candidate.rectangle()
+                if rect.bottom <= list_rect.top and rect.left >= list_rect.left and rect.right <= list_rect.right \
+                        and candidate.window_text().strip():
+                    self._chat_title = candidate
+                    return candidate
+        except Exception as e:
+            self.log(f"[策略] 查找聊天标题控件失败: {e}")
+        return None
+
     def _send_message_mac(self, win, contact, message):
         win.activate()
         pyautogui.hotkey('command', 'f')
@@ -22,6 +22,10 @@ class ConfigManager:
         self.config_path = config_path
         self.config = self._load_config()
     
+    def reload(self):
+        """重新从文件加载配置"""
+        self.config = self._load_config()
+    
     def _load_config(self):
         """加载配置文件
         
@@ -56,6 +60,18 @@ class ConfigManager:
                     "control_type": "Edit",
                     "class_name": "",
                     "description": "消息输入框控件，留空表示使用排除法查找"
+                },
+                "message_list": {
+                    "control_type": "List",
+                    "title": "消息",
+                    "self_name": "",
+                    "description": "聊天消息列表控件，用于确认消息送达"
+                },
+                "chat_title": {
+                    "control_type": "Text",
+                    "class_name": "",
+                    "verify": False,
+                    "description": "聊天标题控件，开启 verify 后用于确认已进入目标聊天"
                 }
             },
             "mac": {
@@ -66,11 +82,38 @@ class ConfigManager:
                 "search_result_wait": 1.5,
                 "chat_window_load": 1.5,
                 "input_focus": 0.5,
-                "typing_pause": 0.3
+                "typing_pause": 0.3,
+                "delivery_confirm": 2.0
             },
             "strategies": {
                 "search_result_selection": "enter_key",
                 "alternative_search_result_selection": "click_first_item"
+            },
+            "layout": {
+                "base_dpi": 96,
+                "targets": {
+                    "search_box": {"anchor": "top_left", "x": 140, "y": 40},
+                    "first_result": {"anchor": "top_left", "x": 140, "y": 120},
+                    "input_box": {"anchor": "bottom_right", "x": -100, "y": -40}
+                }
+            },
+            "strategy_selection": {
+                "stats_file": "strategy_stats.json",
+                "max_attempts": 3,
+                "min_samples": 3,
+                "min_success_rate": 0.8,
+                "probe_interval": 20
+            },
+            "metrics": {
+                "status_interval": 2,
+                "textfile_path": "",
+                "export_interval": 15
+            },
+            "delivery_confirmation": {
+                "mode": "lazy",
+                "batch_size": 5,
+                "tail_size": 20,
+                "idle_flush_seconds": 30
             }
         }
     
@@ -130,6 +173,30 @@ class ConfigManager:
         """
         return self.config.get("strategies", {}).get(strategy_name, "")
     
+    def get_section(self, section_name):
+        """获取整个配置段
+        
+        Args:
+            section_name: 配置段名称
+        
+        Returns:
+            dict: 配置段内容，不存在时为空字典
+        """
+        return self.config.get(section_name, {})
+    
+    def resolve_path(self, file_name):
+        """将相对路径解析为相对于配置文件所在目录的绝对路径
+        
+        Args:
+            file_name: 文件名或路径
+        
+        Returns:
+            str: 绝对路径
+        """
+        if os.path.isabs(file_name):
+            return file_name
+        return os.path.join(os.path.dirname(os.path.abspath(self.config_path)), file_name)
+    
     def update_control_class(self, control_name, class_name):
         """更新控件类名配置
         
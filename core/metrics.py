@@ -0,0 +1,284 @@
+import os
+import threading
+import time
+from collections import deque
+
+# autoWeComLite 使用的指标名
+SENT_TOTAL = "autowecom_messages_sent_total"
+FAILED_TOTAL = "autowecom_messages_failed_total"
+RETRIED_TOTAL = "autowecom_send_retries_total"
+QUEUE_DEPTH = "autowecom_queue_depth"
+PENDING_CONFIRMATIONS = "autowecom_pending_confirmations"
+STAGE_LATENCY = "autowecom_stage_latency_seconds"
+STARTUP_PHASE = "autowecom_startup_phase_seconds"
+IMPORT_TIME = "autowecom_import_seconds"
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """指标基类，支持可选的标签，每组标签值对应一个子指标"""
+
+    type_name = ""
+
+    def __init__(self, name, documentation, labelnames=(), lock=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = lock or threading.Lock()
+        self._children = {}
+        self._labelvalues = ()
+
+    def labels(self, **labels):
+        """返回指定标签值对应的子指标"""
+        values = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            child = self._children.get(values)
+            if child is None:
+                child = self._new_child()
+                child._labelvalues = values
+                self._children[values] = child
+        return child
+
+    def _new_child(self):
+        return type(self)(self.name, self.documentation, self.labelnames, lock=self._lock)
+
+    def _label_text(self, extra=None):
+        pairs = list(zip(self.labelnames, self._labelvalues)) + list(extra or [])
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+    def _samples(self):
+        return []
+
+    def render(self):
+        """以 Prometheus 文本格式输出"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            children = [self] if not self.labelnames else list(self._children.values())
+            for child in children:
+                lines.extend(child._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """只增计数器，同时保留最近的增量用于计算速率"""
+
+    type_name = "counter"
+    # 计算速率时保留的最长时间窗口(秒)
+    RATE_HORIZON = 300
+
+    def __init__(self, name, documentation, labelnames=(), lock=None):
+        super().__init__(name, documentation, labelnames, lock)
+        self.value = 0
+        self._recent = deque(maxlen=10000)
+
+    def inc(self, amount=1):
+        if amount <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self.value += amount
+            self._recent.append((now, amount))
+
+    def count_since(self, window):
+        """返回最近 window 秒内的增量"""
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0][0] > self.RATE_HORIZON:
+                self._recent.popleft()
+            return sum(amount for ts, amount in self._recent if now - ts <= window)
+
+    def _samples(self):
+        return [f"{self.name}{self._label_text()} {_format_value(self.value)}"]
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+
+    type_name = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), lock=None):
+        super().__init__(name, documentation, labelnames, lock)
+        self.value = 0
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def _samples(self):
+        return [f"{self.name}{self._label_text()} {_format_value(self.value)}"]
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram(_Metric):
+    """固定分桶的直方图"""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), lock=None, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames, lock)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def _new_child(self):
+        return Histogram(self.name, self.documentation, self.labelnames, lock=self._lock, buckets=self.buckets[:-1])
+
+    def observe(self, value):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """上下文管理器，记录代码块耗时"""
+        return _Timer(self)
+
+    def _samples(self):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{self._label_text([('le', _format_value(bound))])} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text()} {_format_value(self.sum)}")
+        lines.append(f"{self.name}_count{self._label_text()} {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """进程内指标注册表
+
+    同名指标只创建一次，重复获取返回同一个对象。
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif documentation and not metric.documentation:
+                # 先被状态栏等只读方获取的指标，补上说明
+                metric.documentation = documentation
+            return metric
+
+    def counter(self, name, documentation="", labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation="", labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation="", labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        """以 Prometheus 文本格式输出所有指标"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """原子地写入 Prometheus 文本文件，供 node exporter 的 textfile collector 采集"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def summary(self, window=60):
+        """状态栏使用的简要统计
+
+        Args:
+            window: 统计速率的时间窗口(秒)
+
+        Returns:
+            str: 摘要文本
+        """
+        sent = self.counter(SENT_TOTAL)
+        failed = self.counter(FAILED_TOTAL, labelnames=("reason",))
+        # error: 发送过程出错；unconfirmed: 已按回车但未确认送达(已计入 sent)
+        errors = failed.labels(reason="error")
+        unconfirmed = failed.labels(reason="unconfirmed")
+        recent_sent = sent.count_since(window)
+        recent_errors = errors.count_since(window)
+        recent_attempts = recent_sent + recent_errors
+        recent_failed = recent_errors + unconfirmed.count_since(window)
+        per_minute = recent_sent * 60.0 / window
+        error_rate = min(100.0, recent_failed * 100.0 / recent_attempts) if recent_attempts else 0.0
+        return (f"已发送 {sent.value} | 失败 {errors.value + unconfirmed.value} | {per_minute:.1f} 条/分 | "
+                f"错误率 {error_rate:.0f}% | 队列 {self.gauge(QUEUE_DEPTH).value}")
+
+
+class MetricsExporter(threading.Thread):
+    """后台线程，定期把指标写入 Prometheus 文本文件"""
+
+    def __init__(self, registry, path, interval=15, logger=None):
+        super().__init__(name="MetricsExporter", daemon=True)
+        self.registry = registry
+        self.path = path
+        self.interval = max(1, interval)
+        self.logger = logger or (lambda msg: print(msg))
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.export()
+
+    def export(self):
+        try:
+            self.registry.write_textfile(self.path)
+        except Exception as e:
+            self.logger(f"[警告] 写入指标文件失败: {e}")
+
+    def stop(self):
+        """停止线程，并在退出前写入最后一次"""
+        self._stop_event.set()
+        self.export()
+
+
+# 默认的全局注册表
+registry = MetricsRegistry()
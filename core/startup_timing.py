@@ -0,0 +1,74 @@
+import importlib
+import threading
+import time
+
+from core import metrics
+
+
+class StartupTimer:
+    """记录启动各阶段和重量级模块的导入耗时
+
+    计时起点为本模块被导入的时刻，应在 main.py 中最先导入。
+    完整的导入树可用 `python -X importtime main.py` 查看。
+    """
+
+    def __init__(self, registry=None):
+        self.start = time.perf_counter()
+        self.phases = []
+        self.imports = []
+        self._lock = threading.Lock()
+        registry = registry or metrics.registry
+        self.phase_gauge = registry.gauge(metrics.STARTUP_PHASE, "启动各阶段距进程启动的耗时(秒)", labelnames=("phase",))
+        self.import_gauge = registry.gauge(metrics.IMPORT_TIME, "模块导入耗时(秒)", labelnames=("module",))
+
+    def mark(self, phase):
+        """记录某个启动阶段完成的时刻，同一阶段只记录第一次
+
+        Args:
+            phase: 阶段名称
+
+        Returns:
+            float: 距启动的秒数
+        """
+        with self._lock:
+            for name, elapsed in self.phases:
+                if name == phase:
+                    return elapsed
+            elapsed = time.perf_counter() - self.start
+            self.phases.append((phase, elapsed))
+        self.phase_gauge.labels(phase=phase).set(elapsed)
+        return elapsed
+
+    def timed_import(self, module_name):
+        """导入模块并记录耗时
+
+        Args:
+            module_name: 模块名
+
+        Returns:
+            module: 导入的模块
+        """
+        begin = time.perf_counter()
+        module = importlib.import_module(module_name)
+        duration = time.perf_counter() - begin
+        with self._lock:
+            self.imports.append((module_name, duration))
+        self.import_gauge.labels(module=module_name).set(duration)
+        return module
+
+    def report(self):
+        """返回启动耗时报告文本"""
+        with self._lock:
+            phases = list(self.phases)
+            imports = list(self.imports)
+        lines = ["[启动] ===== 启动耗时 ====="]
+        for name, elapsed in phases:
+            lines.append(f"  阶段 {name}: {elapsed:.3f} 秒")
+        for name, duration in imports:
+            lines.append(f"  导入 {name}: {duration:.3f} 秒")
+        lines.append("[启动] ===== 报告结束 =====")
+        return "\n".join(lines)
+
+
+# 进程级的启动计时器
+timer = StartupTimer()
@@ -1,10 +1,34 @@
+# 最先导入，作为启动计时起点
+from core.startup_timing import timer as startup_timer
+import ctypes
+import platform
 import wx
 
 from ui.main_frame import MainFrame
 
+def enable_dpi_awareness():
+    """在创建任何窗口前声明 DPI 感知
+
+    pywinauto 延迟到界面显示后才导入，此时它自己设置 DPI 感知已经无效；
+    提前声明可保证 UIA 控件坐标、鼠标坐标和窗口 DPI 使用同一套物理像素。
+    """
+    if platform.system() != "Windows":
+        return
+    try:
+        # PROCESS_PER_MONITOR_DPI_AWARE
+        ctypes.windll.shcore.SetProcessDpiAwareness(2)
+    except Exception:
+        try:
+            ctypes.windll.user32.SetProcessDPIAware()
+        except Exception:
+            pass
+
 def main():
+    startup_timer.mark("ui_imported")
+    enable_dpi_awareness()
     app = wx.App(False)
     frame = MainFrame(None, title="autoWeComLite")
+    startup_timer.mark("frame_shown")
     app.MainLoop()
 
 if __name__ == "__main__":
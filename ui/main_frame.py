@@ -1,14 +1,21 @@
 import wx
 from ui.send_panel import SendPanel
 from ui.settings_panel import SettingsPanel
+from core.config_manager import ConfigManager
+from core import metrics
+from core import startup_timing
 
 class MainFrame(wx.Frame):
     def __init__(self, parent, title):
         super().__init__(parent, title=title, size=(900, 600))
         self.SetMinSize((700, 500))
+        self.config_manager = ConfigManager()
         self._init_ui()
+        self._init_metrics()
         self.Centre()
         self.Show(True)
+        # 事件循环处理完首次绘制后再开始预热自动化
+        wx.CallAfter(self._on_first_paint)
 
     def _init_ui(self):
         panel = wx.Panel(self)
@@ -26,8 +33,8 @@ class MainFrame(wx.Frame):
 
         # 内容区：两个页面
         self.panels = {}
-        self.panels['send'] = SendPanel(panel, on_send_callback=self.on_send_message)
-        self.panels['settings'] = SettingsPanel(panel)
+        self.panels['send'] = SendPanel(panel, on_send_callback=self.on_send_message, config_manager=self.config_manager)
+        self.panels['settings'] = SettingsPanel(panel, config_manager=self.config_manager)
         for p in self.panels.values():
             p.Hide()
             vbox.Add(p, 1, wx.EXPAND|wx.ALL, 0)
@@ -44,6 +51,45 @@ class MainFrame(wx.Frame):
         self.Layout()
         self.Fit()
 
+    def _on_first_paint(self):
+        startup_timing.timer.mark("first_paint")
+        self.panels['send'].start_warm_up()
+
+    def _init_metrics(self):
+        """状态栏定时刷新发送统计，并按配置定期导出 Prometheus 文本文件"""
+        metrics_config = self.config_manager.get_section("metrics")
+        self._status_text = ""
+        self.status_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self._on_status_timer, self.status_timer)
+        self.status_timer.Start(int(metrics_config.get("status_interval", 2) * 1000))
+
+        self.metrics_exporter = None
+        textfile_path = metrics_config.get("textfile_path", "")
+        if textfile_path:
+            self.metrics_exporter = metrics.MetricsExporter(
+                metrics.registry,
+                self.config_manager.resolve_path(textfile_path),
+                interval=metrics_config.get("export_interval", 15),
+                logger=lambda msg: wx.CallAfter(self.panels['send'].add_log, msg),
+            )
+            self.metrics_exporter.start()
+        self.Bind(wx.EVT_CLOSE, self._on_close)
+
+    def _on_status_timer(self, event):
+        text = metrics.registry.summary()
+        # 文本不变时不刷新状态栏
+        if text != self._status_text:
+            self._status_text = text
+            self.SetStatusText(text)
+
+    def _on_close(self, event):
+        self.status_timer.Stop()
+        # 取消排队中的发送，确认积压的消息后停止自动化线程
+        self.panels['send'].shutdown()
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+        event.Skip()
+
     def show_panel(self, name):
         if self.current_panel:
             self.current_panel.Hide()
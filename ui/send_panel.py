@@ -1,12 +1,31 @@
 import wx
-from automation.wechat_auto import WeChatAutomation
+from concurrent.futures import ThreadPoolExecutor
+from core import metrics
+from core import startup_timing
+
+# 预热时单独计时的重量级依赖，导入失败时由 WeChatAutomation 报错
+HEAVY_MODULES = ("pywinauto", "win32gui", "pyautogui", "pygetwindow", "pyperclip")
 
 class SendPanel(wx.Panel):
-    def __init__(self, parent, on_send_callback=None):
+    def __init__(self, parent, on_send_callback=None, config_manager=None):
         super().__init__(parent)
         self.on_send_callback = on_send_callback
+        self.config_manager = config_manager
+        # 自动化延迟到界面显示后在后台线程初始化
+        self.automation = None
+        self._first_send_done = False
+        # 已提交但尚未完成的发送数，归零并空闲一段时间后确认积压的消息
+        self._queued_sends = 0
+        delivery_config = config_manager.get_section("delivery_confirmation") if config_manager else {}
+        self._idle_flush_ms = int(delivery_config.get("idle_flush_seconds", 30) * 1000)
+        self._idle_flush_timer = None
+        # 已提交到自动化线程的任务，关闭时取消尚未开始的部分
+        self._futures = set()
+        self._closing = False
+        self.queue_gauge = metrics.registry.gauge(metrics.QUEUE_DEPTH, "已提交、等待或正在发送的消息数")
+        # 所有自动化操作在同一个后台线程中执行，COM/UIA 对象只在创建它们的线程中使用
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="automation")
         self._init_ui()
-        self.automation = WeChatAutomation(logger=self.add_log)
 
     def _init_ui(self):
         vbox = wx.BoxSizer(wx.VERTICAL)
@@ -45,6 +64,39 @@ class SendPanel(wx.Panel):
 
         self.SetSizer(vbox)
 
+    def _submit(self, fn, *args):
+        future = self._executor.submit(fn, *args)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        return future
+
+    def start_warm_up(self):
+        """界面首次绘制后调用，在后台线程中初始化并预热自动化"""
+        self._submit(self._warm_up)
+
+    def _warm_up(self):
+        try:
+            self._ensure_automation()
+            self.automation.warm_up()
+            startup_timing.timer.mark("automation_warm")
+        except Exception as e:
+            self.add_log(f"[预热] 预热未完成，将在发送时重试: {e}")
+        self.add_log(startup_timing.timer.report())
+
+    def _ensure_automation(self):
+        """首次使用时导入并创建自动化对象，仅在后台线程中调用"""
+        if self.automation is not None:
+            return self.automation
+        for module_name in HEAVY_MODULES:
+            try:
+                startup_timing.timer.timed_import(module_name)
+            except ImportError:
+                pass
+        wechat_auto = startup_timing.timer.timed_import("automation.wechat_auto")
+        self.automation = wechat_auto.WeChatAutomation(logger=self.add_log, config_manager=self.config_manager)
+        startup_timing.timer.mark("automation_ready")
+        return self.automation
+
     def _on_send(self, event):
         contact = self.txt_contact.GetValue().strip()
         message = self.txt_msg.GetValue().strip()
@@ -52,14 +104,71 @@ class SendPanel(wx.Panel):
             self.add_log("[警告] 联系人和消息内容不能为空！")
             return
         self.btn_send.Disable()
-        try:
-            self.automation.send_message(contact, message)
-        except Exception as e:
-            self.add_log(f"[异常] {e}")
+        self._stop_idle_flush()
+        self._queued_sends += 1
+        self.queue_gauge.inc()
+        # 发送排在预热之后执行，预热未完成时自动等待
+        future = self._submit(self._send, contact, message)
+        future.add_done_callback(lambda f: wx.CallAfter(self._on_send_done, f))
+
+    def _send(self, contact, message):
+        self._ensure_automation().send_message(contact, message)
+        if not self._first_send_done:
+            self._first_send_done = True
+            elapsed = startup_timing.timer.mark("first_send")
+            self.add_log(f"[启动] 首次发送完成，距启动 {elapsed:.2f} 秒")
+
+    def _on_send_done(self, future):
+        if self._closing:
+            return
+        self._queued_sends -= 1
+        self.queue_gauge.dec()
+        if future.exception():
+            self.add_log(f"[异常] {future.exception()}")
         self.btn_send.Enable()
+        # 发送队列空闲一段时间后再确认积压的消息，连续发送时不打断 lazy 批量确认
+        if self._queued_sends == 0 and self._idle_flush_ms > 0:
+            self._idle_flush_timer = wx.CallLater(self._idle_flush_ms, self.flush_confirmations)
+
+    def _stop_idle_flush(self):
+        if self._idle_flush_timer is not None:
+            self._idle_flush_timer.Stop()
+            self._idle_flush_timer = None
+
+    def flush_confirmations(self):
+        """在自动化线程中确认所有待确认消息，并在日志中报告未确认的任务ID"""
+        self._idle_flush_timer = None
+        return self._submit(self._flush_confirmations)
+
+    def shutdown(self):
+        """窗口关闭时调用：取消排队中的发送和预热，确认积压的消息后停止自动化线程
+
+        正在执行的发送无法中断，会在其完成后执行最后一次确认；之后的日志输出到控制台。
+        """
+        self._stop_idle_flush()
+        self._closing = True
+        for future in list(self._futures):
+            future.cancel()
+        self._submit(self._flush_confirmations)
+        self._executor.shutdown(wait=False)
+
+    def _flush_confirmations(self):
+        if self.automation is None:
+            return
+        unconfirmed = self.automation.flush_confirmations()
+        if unconfirmed:
+            self.add_log(f"[确认] 本次未确认送达的任务: {', '.join(unconfirmed)}")
 
     def add_log(self, msg):
+        # 关闭后控件可能已销毁，日志改为输出到控制台
+        if self._closing:
+            print(msg)
+            return
+        # 后台线程的日志转到界面线程输出
+        if not wx.IsMainThread():
+            wx.CallAfter(self.add_log, msg)
+            return
         self.log_ctrl.AppendText(msg + "\n")
 
     def _on_clear_log(self, event):
-        self.log_ctrl.SetValue("") 
\ No newline at end of file
+        self.log_ctrl.SetValue("")
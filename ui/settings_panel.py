@@ -2,9 +2,9 @@ import wx
 from core.config_manager import ConfigManager
 
 class SettingsPanel(wx.Panel):
-    def __init__(self, parent):
+    def __init__(self, parent, config_manager=None):
         super().__init__(parent)
-        self.config_manager = ConfigManager()
+        self.config_manager = config_manager or ConfigManager()
         self._init_ui()
         
         # 确保初始布局正确渲染
@@ -74,7 +74,7 @@ class SettingsPanel(wx.Panel):
     def refresh_config_data(self):
         """刷新配置数据，在面板显示时调用"""
         # 重新加载配置
-        self.config_manager = ConfigManager()
+        self.config_manager.reload()
         
         # 更新界面控件的值
         main_window_config = self.config_manager.get_control_config("main_window")